@@ -0,0 +1,285 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from multiprocessing import Pool
+import pandas as pd
+from parsers import SECTIONS
+from parsers.normalizer import normalize
+from utils.logger import logger
+
+PARSER_MODULES = {
+    'EDIFACT': ('edifact_parser', 'parse_edifact'),
+    'EDIXML': ('xml_parser', 'parse_xml'),
+    'EDISIMPLEX': ('edisimplex_parser', 'parse_edisimplex')
+}
+
+_worker = {}
+
+def load_parsers(root, label):
+    """Loads the three parse functions from the parsers/ directory of a checkout.
+
+    The modules are loaded under private names so two versions can live in
+    the same process. They still import utils.* and the parsers package from the current tree.
+    """
+    parse_functions = {}
+    for format_type, (module_name, function_name) in PARSER_MODULES.items():
+        path = os.path.join(root, 'parsers', f'{module_name}.py')
+        spec = importlib.util.spec_from_file_location(f'_{label}_{module_name}', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        parse_functions[format_type] = getattr(module, function_name)
+    return parse_functions
+
+def _init_worker(reference_root, candidate_root, measure_memory, raw, repeat):
+    # Per-segment debug logging would dominate the timings
+    logger.setLevel(logging.CRITICAL)
+    _worker['reference'] = load_parsers(reference_root, 'reference')
+    _worker['candidate'] = load_parsers(candidate_root, 'candidate')
+    _worker['measure_memory'] = measure_memory
+    _worker['raw'] = raw
+    _worker['repeat'] = repeat
+
+def _entry_values(entry):
+    if hasattr(entry, '__dataclass_fields__'):
+        return tuple((name, getattr(entry, name)) for name in entry.__dataclass_fields__)
+    return entry
+
+def _comparable(parsed_data, format_type):
+    """Returns {section: tuple of entries} in the form the two sides are compared in."""
+    if _worker['raw']:
+        return {section: tuple(_entry_values(entry) for entry in parsed_data.get(section, []))
+                for section in SECTIONS}
+    message = normalize(parsed_data, format_type)
+    return {section: getattr(message, section) for section in SECTIONS}
+
+def _outcome(parse, content, format_type):
+    """Parses one message and returns its output in comparable form."""
+    try:
+        return _comparable(parse(content), format_type)
+    except Exception as e:
+        # An exception is an outcome too, also when the output cannot be
+        # normalized; it matches only the same exception type
+        return {section: ('error', type(e).__name__) for section in SECTIONS}
+
+def _peak_memory(parse, content):
+    tracemalloc.start()
+    try:
+        parse(content)
+    except Exception:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def _time_batch(parse, contents):
+    started = time.perf_counter()
+    for content in contents:
+        try:
+            parse(content)
+        except Exception:
+            pass
+    return time.perf_counter() - started
+
+def compare_message(index, format_type, content):
+    """Runs one message through both implementations and diffs the sections."""
+    reference_parse = _worker['reference'][format_type]
+    candidate_parse = _worker['candidate'][format_type]
+    reference = _outcome(reference_parse, content, format_type)
+    candidate = _outcome(candidate_parse, content, format_type)
+
+    mismatches = {}
+    # Per parsed_data section rather than per segment or group tag, since a
+    # section does not map to one tag in every format
+    for section in SECTIONS:
+        if reference[section] != candidate[section]:
+            mismatches[section] = {'reference': repr(reference[section]), 'candidate': repr(candidate[section])}
+
+    result = {'index': index, 'format': format_type, 'mismatches': mismatches}
+    if _worker['measure_memory']:
+        result['reference_peak_bytes'] = _peak_memory(reference_parse, content)
+        result['candidate_peak_bytes'] = _peak_memory(candidate_parse, content)
+    return result
+
+def compare_batch(batch):
+    """Diffs every message of a batch and times both implementations on it.
+
+    Timing is per format over the whole batch, repeated _worker['repeat']
+    times with the reference and candidate order alternating, and the
+    fastest run of each side is kept. Single-message spans of a few
+    microseconds are too noisy to compare.
+    """
+    results = []
+    contents_per_format = {}
+    skipped = 0
+    for index, format_type, content in batch:
+        if format_type not in PARSER_MODULES:
+            skipped += 1
+            continue
+        results.append(compare_message(index, format_type, content))
+        contents_per_format.setdefault(format_type, []).append(content)
+
+    timings = {}
+    for format_type, contents in contents_per_format.items():
+        sides = {'reference': _worker['reference'][format_type], 'candidate': _worker['candidate'][format_type]}
+        best = {'reference': float('inf'), 'candidate': float('inf')}
+        for run in range(_worker['repeat']):
+            order = ('reference', 'candidate') if run % 2 == 0 else ('candidate', 'reference')
+            for side in order:
+                best[side] = min(best[side], _time_batch(sides[side], contents))
+        timings[format_type] = {'reference_seconds': best['reference'], 'candidate_seconds': best['candidate']}
+
+    return results, timings, skipped
+
+def iter_corpus(file_path, chunksize=10000):
+    """Yields (index, format, content) for every row of an input CSV."""
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        for row in chunk.itertuples():
+            yield row.Index, row.FORMAT, row.CONTENIDO
+
+def iter_batches(file_path, batch_size):
+    batch = []
+    for item in iter_corpus(file_path):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _new_format_stats():
+    return {
+        'messages': 0,
+        'mismatched_messages': 0,
+        'mismatches_per_section': {},
+        'reference_seconds': 0.0,
+        'candidate_seconds': 0.0,
+        'reference_peak_bytes_max': 0,
+        'candidate_peak_bytes_max': 0,
+        'reference_peak_bytes_total': 0,
+        'candidate_peak_bytes_total': 0
+    }
+
+def run_comparison(file_path, reference_root, candidate_root, processes=None, measure_memory=False,
+                   raw=False, max_examples=20, batch_size=200, repeat=5):
+    """Compares the reference and candidate parsers over a corpus CSV.
+
+    The corpus is sent to the pool in batches of batch_size messages. Returns
+    a report with, per format, the mismatch count per section and the
+    timing and memory totals of both sides, plus up to max_examples
+    mismatching messages. Times are the sum over batches of the fastest of
+    repeat runs.
+    """
+    formats = {}
+    examples = []
+    skipped = 0
+    started = time.perf_counter()
+
+    initargs = (reference_root, candidate_root, measure_memory, raw, repeat)
+    with Pool(processes, initializer=_init_worker, initargs=initargs) as pool:
+        for results, timings, batch_skipped in pool.imap_unordered(compare_batch, iter_batches(file_path, batch_size)):
+            skipped += batch_skipped
+            for format_type, timing in timings.items():
+                stats = formats.setdefault(format_type, _new_format_stats())
+                stats['reference_seconds'] += timing['reference_seconds']
+                stats['candidate_seconds'] += timing['candidate_seconds']
+
+            for result in results:
+                stats = formats[result['format']]
+                stats['messages'] += 1
+                if measure_memory:
+                    for side in ('reference', 'candidate'):
+                        peak = result[f'{side}_peak_bytes']
+                        stats[f'{side}_peak_bytes_total'] += peak
+                        stats[f'{side}_peak_bytes_max'] = max(stats[f'{side}_peak_bytes_max'], peak)
+
+                if result['mismatches']:
+                    stats['mismatched_messages'] += 1
+                    for section in result['mismatches']:
+                        stats['mismatches_per_section'][section] = stats['mismatches_per_section'].get(section, 0) + 1
+                    if len(examples) < max_examples:
+                        examples.append({'index': result['index'], 'format': result['format'],
+                                         'mismatches': result['mismatches']})
+
+    for stats in formats.values():
+        reference_seconds = stats['reference_seconds']
+        candidate_seconds = stats['candidate_seconds']
+        stats['speedup'] = reference_seconds / candidate_seconds if candidate_seconds > 0 else None
+        if measure_memory:
+            stats['reference_peak_bytes_mean'] = stats['reference_peak_bytes_total'] / stats['messages']
+            stats['candidate_peak_bytes_mean'] = stats['candidate_peak_bytes_total'] / stats['messages']
+        del stats['reference_peak_bytes_total'], stats['candidate_peak_bytes_total']
+
+    return {
+        'reference': reference_root,
+        'candidate': candidate_root,
+        'normalized': not raw,
+        'repeat': repeat,
+        'wall_seconds': time.perf_counter() - started,
+        'skipped_messages': skipped,
+        'formats': formats,
+        'examples': examples
+    }
+
+def print_report(report):
+    print(f"Reference: {report['reference']}")
+    print(f"Candidate: {report['candidate']}")
+    print(f"Compared {'normalized' if report['normalized'] else 'raw'} output in {report['wall_seconds']:.1f}s"
+          f" ({report['skipped_messages']} messages with unsupported formats skipped)")
+    print(f"Times are per batch, best of {report['repeat']} runs with alternating order")
+
+    for format_type, stats in sorted(report['formats'].items()):
+        print(f"\n{format_type}: {stats['messages']} messages, {stats['mismatched_messages']} with mismatches")
+        for section, count in sorted(stats['mismatches_per_section'].items()):
+            print(f"    {section}: {count}")
+
+        reference_us = stats['reference_seconds'] / stats['messages'] * 1e6
+        candidate_us = stats['candidate_seconds'] / stats['messages'] * 1e6
+        speedup = f"{stats['speedup']:.2f}x" if stats['speedup'] else "n/a"
+        print(f"    time per message: reference {reference_us:.1f} us, candidate {candidate_us:.1f} us ({speedup})")
+        if 'reference_peak_bytes_mean' in stats:
+            reference_kb = stats['reference_peak_bytes_mean'] / 1024
+            candidate_kb = stats['candidate_peak_bytes_mean'] / 1024
+            print(f"    mean peak memory: reference {reference_kb:.1f} KB, candidate {candidate_kb:.1f} KB"
+                  f" ({candidate_kb - reference_kb:+.1f} KB)")
+
+    for example in report['examples']:
+        print(f"\nMessage {example['index']} ({example['format']}):")
+        for section, diff in example['mismatches'].items():
+            print(f"    {section} reference: {diff['reference']}")
+            print(f"    {section} candidate: {diff['candidate']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the output and speed of two versions of the parsers over a corpus CSV.")
+    parser.add_argument('corpus', help="CSV file with FORMAT and CONTENIDO columns")
+    parser.add_argument('--reference', required=True, help="root of the reference checkout (e.g. a git worktree)")
+    parser.add_argument('--candidate', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="root of the candidate checkout (default: this tree)")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="worker processes (default: CPU count); keep it at or below the physical cores for stable timings")
+    parser.add_argument('--batch-size', type=int, default=200, help="messages per batch sent to a worker and timed together")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per batch; the fastest is kept")
+    parser.add_argument('--memory', action='store_true', help="also measure the peak memory of each parse")
+    parser.add_argument('--raw', action='store_true', help="compare parsed_data as-is instead of normalized")
+    parser.add_argument('--examples', type=int, default=20, help="mismatching messages to include in the report")
+    parser.add_argument('--json', dest='json_path', help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run_comparison(args.corpus, os.path.abspath(args.reference), os.path.abspath(args.candidate),
+                            processes=args.processes, measure_memory=args.memory, raw=args.raw,
+                            max_examples=args.examples, batch_size=args.batch_size, repeat=args.repeat)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    mismatched = sum(stats['mismatched_messages'] for stats in report['formats'].values())
+    sys.exit(1 if mismatched else 0)
+
+if __name__ == "__main__":
+    main()
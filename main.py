@@ -2,10 +2,11 @@ import os
 import pandas as pd
 import json
 import uuid
-from parsers.edifact_parser import parse_edifact
-from parsers.xml_parser import parse_xml
-from parsers.edisimplex_parser import parse_edisimplex
+from parsers.edifact_parser import EdifactParser
+from parsers.xml_parser import XmlParser
+from parsers.edisimplex_parser import EdisimplexParser
 from utils.logger import logger
+from utils.memory import MemoryBudget, peak_rss_bytes
 
 def read_input_file(file_path):
     """Reads the input CSV file and returns a DataFrame."""
@@ -36,26 +37,123 @@ def save_to_json(parsed_data, output_dir):
         logger.error(f"Failed to save JSON to {output_path}: {e}")
     return output_path
 
-def process_messages(df, output_dir):
-    """Processes each message in the DataFrame and saves the parsed data to JSON."""
+def process_messages(df, output_dir, sink=None):
+    """Processes each message in the DataFrame and saves the parsed data.
+
+    Messages are written to JSON files in output_dir unless a sink (e.g. a
+    utils.sqlite_sink.SQLiteSink) is given, in which case they are passed to
+    its write() method instead.
+    """
+    parsers = {
+        'EDIFACT': EdifactParser(),
+        'EDIXML': XmlParser(),
+        'EDISIMPLEX': EdisimplexParser()
+    }
+
     for index, row in df.iterrows():
         format_type = row['FORMAT']
         content = row['CONTENIDO']
         
         logger.debug(f"Processing message {index} of format {format_type}")
         
-        if format_type == 'EDIFACT':
-            parsed_data = parse_edifact(content)
-        elif format_type == 'EDIXML':
-            parsed_data = parse_xml(content)
-        elif format_type == 'EDISIMPLEX':
-            parsed_data = parse_edisimplex(content)
-        else:
+        parser = parsers.get(format_type)
+        if parser is None:
             logger.warning(f"Unsupported format {format_type} for message {index}")
             continue
 
-        output_path = save_to_json(parsed_data, output_dir)
-        print(f"Saved parsed data to {output_path}")
+        parsed_data = parser.parse(content)
+        write_result(parsed_data, format_type, output_dir, sink)
+
+def write_result(parsed_data, format_type, output_dir, sink=None):
+    """Passes parsed data to the sink, or saves it to JSON when there is none."""
+    if sink is not None:
+        sink.write(parsed_data, format_type)
+        return
+
+    output_path = save_to_json(parsed_data, output_dir)
+    print(f"Saved parsed data to {output_path}")
+
+def process_messages_bounded(file_path, output_dir, sink=None, max_rss_mb=1024, chunksize=500,
+                             stream_threshold=1_000_000, check_every=100):
+    """Processes the input CSV in chunks while keeping the process RSS under max_rss_mb.
+
+    Rows are read in chunks of up to chunksize, and each result is written out
+    as soon as it is parsed. Messages longer than stream_threshold characters
+    go through the parsers' parse_stream(). The RSS is checked every
+    check_every messages, after every streamed message and after every chunk.
+    When the budget reports pressure, the rows the sink still holds in memory
+    are spilled to disk with sink.flush(), and the next chunks are read with
+    half as many rows. The chunk size grows back towards chunksize once RSS is
+    under the budget again.
+
+    Returns the run metrics, including the number of spills and the peak RSS,
+    which is the high-water mark of the whole process rather than of the checks.
+    """
+    parsers = {
+        'EDIFACT': EdifactParser(),
+        'EDIXML': XmlParser(),
+        'EDISIMPLEX': EdisimplexParser()
+    }
+    budget = MemoryBudget(max_rss_mb)
+    metrics = {"messages": 0, "streamed": 0, "throttled": 0, "spills": 0}
+    chunk_rows = chunksize
+
+    def relieve_pressure():
+        nonlocal chunk_rows
+        if getattr(sink, "pending_messages", 0):
+            sink.flush()
+            metrics["spills"] += 1
+        if chunk_rows > 1:
+            chunk_rows = max(1, chunk_rows // 2)
+            metrics["throttled"] += 1
+            logger.debug(f"Memory budget exceeded, reading {chunk_rows} rows per chunk")
+
+    with pd.read_csv(file_path, chunksize=chunksize) as reader:
+        while True:
+            try:
+                chunk = reader.get_chunk(chunk_rows)
+            except StopIteration:
+                break
+            if chunk.empty:
+                break
+
+            for index, row in chunk.iterrows():
+                format_type = row['FORMAT']
+                content = row['CONTENIDO']
+
+                logger.debug(f"Processing message {index} of format {format_type}")
+
+                parser = parsers.get(format_type)
+                if parser is None:
+                    logger.warning(f"Unsupported format {format_type} for message {index}")
+                    continue
+
+                streamed = isinstance(content, str) and len(content) > stream_threshold
+                if streamed:
+                    logger.debug(f"Message {index} is {len(content)} characters long, using the streaming parser")
+                    parsed_data = parser.parse_stream(content)
+                    metrics["streamed"] += 1
+                else:
+                    parsed_data = parser.parse(content)
+                write_result(parsed_data, format_type, output_dir, sink)
+                metrics["messages"] += 1
+
+                if (streamed or metrics["messages"] % check_every == 0) and budget.under_pressure():
+                    relieve_pressure()
+
+            del chunk
+            if budget.under_pressure():
+                relieve_pressure()
+            elif budget.within_budget() and chunk_rows < chunksize:
+                chunk_rows = min(chunksize, chunk_rows * 2)
+
+    metrics["peak_rss_mb"] = peak_rss_bytes() / (1024 * 1024)
+    logger.info(
+        f"Processed {metrics['messages']} messages ({metrics['streamed']} streamed), "
+        f"peak RSS {metrics['peak_rss_mb']:.1f} MB, {metrics['spills']} spills, "
+        f"{metrics['throttled']} throttled chunks"
+    )
+    return metrics
 
 def find_csv_file(directory):
     """Finds the first CSV file in the given directory."""
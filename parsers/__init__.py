@@ -0,0 +1,13 @@
+# Sections of the parsed_data dict returned by every parser, in output order
+SECTIONS = (
+    "message_header",
+    "beginning_of_message",
+    "date_time_period",
+    "free_text",
+    "references",
+    "transport_details",
+    "name_and_address",
+    "goods_item_details",
+    "measurements",
+    "equipment_details"
+)
@@ -1,7 +1,9 @@
 import logging
 from dataclasses import dataclass
 from typing import Optional
+from parsers import SECTIONS
 from utils.logger import logger
+from utils.text import iter_split
 
 @dataclass
 class MessageHeader:
@@ -68,132 +70,178 @@ class EquipmentDetails:
     id_number: Optional[str]
     size_and_type: Optional[str]
 
-def parse_edifact(edifact_message: str) -> dict:
-    parsed_data = {
-        "message_header": [],
-        "beginning_of_message": [],
-        "date_time_period": [],
-        "free_text": [],
-        "references": [],
-        "transport_details": [],
-        "name_and_address": [],
-        "goods_item_details": [],
-        "measurements": [],
-        "equipment_details": []
+def get_text_safe(elements, index):
+    return elements[index] if index < len(elements) else None
+
+class EdifactParser:
+    """Parses EDIFACT messages segment by segment."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears the state left by the previous message."""
+        self.parsed_data = {section: [] for section in SECTIONS}
+        self._sender_id = None
+        self._recipient_id = None
+
+    def parse(self, edifact_message: str) -> dict:
+        return self._parse_segments(edifact_message, str.split)
+
+    def parse_stream(self, edifact_message: str) -> dict:
+        """Same as parse(), but splits the segments lazily."""
+        return self._parse_segments(edifact_message, iter_split)
+
+    def _parse_segments(self, edifact_message, split):
+        self.reset()
+        handlers = self._handlers
+
+        try:
+            segments = split(edifact_message.strip(), "'")
+
+            for segment in segments:
+                elements = segment.split("+")
+                tag = elements[0].split(":")[0].strip()
+
+                logger.debug(f"Parsing segment: {segment}")
+
+                handler = handlers.get(tag)
+                if handler is not None:
+                    handler(self, elements)
+
+            logger.info("EDIFACT message parsed successfully")
+        except Exception as e:
+            logger.error(f"Error parsing EDIFACT message: {e}")
+
+        return self.parsed_data
+
+    def parse_many(self, edifact_messages):
+        """Parses an iterable of messages, yielding one parsed_data dict per message."""
+        for edifact_message in edifact_messages:
+            yield self.parse(edifact_message)
+
+    def _parse_unb(self, elements):
+        self._sender_id = get_text_safe(elements[2].split(":"), 0)
+        self._recipient_id = get_text_safe(elements[3].split(":"), 0)
+
+    def _parse_unh(self, elements):
+        self.parsed_data["message_header"].append(MessageHeader(
+            sender_id=self._sender_id,
+            recipient_id=self._recipient_id,
+            message_reference_number=get_text_safe(elements, 1),
+            message_type=get_text_safe(elements[2].split(":"), 0),
+            version_number=get_text_safe(elements[2].split(":"), 1)
+        ))
+
+    def _parse_bgm(self, elements):
+        self.parsed_data["beginning_of_message"].append(BeginningOfMessage(
+            message_name_code=get_text_safe(elements, 1),
+            document_message_number=get_text_safe(elements, 2),
+            message_function_code=get_text_safe(elements, 3)
+        ))
+
+    def _parse_dtm(self, elements):
+        date_time_info = get_text_safe(elements, 1).split(":")
+        self.parsed_data["date_time_period"].append(DateTimePeriod(
+            qualifier=get_text_safe(date_time_info, 0),
+            period=get_text_safe(date_time_info, 1)
+        ))
+
+    def _parse_ftx(self, elements):
+        self.parsed_data["free_text"].append(FreeText(
+            qualifier=get_text_safe(elements, 1),
+            text=get_text_safe(elements, 4)
+        ))
+
+    def _parse_rff(self, elements):
+        reference_info = get_text_safe(elements, 1).split(":")
+        self.parsed_data["references"].append(Reference(
+            qualifier=get_text_safe(reference_info, 0),
+            number=get_text_safe(reference_info, 1)
+        ))
+
+    def _parse_tdt(self, elements):
+        transport_info = get_text_safe(elements, 8).split(":::") if len(elements) > 8 else ["", "", ""]
+        # id:::name:nationality carries the name after the empty code list and agency
+        transport_name = transport_info[1] if len(transport_info) > 1 else transport_info[0]
+        transport_nationality = None
+        if ":" in transport_name:
+            transport_name, transport_nationality = transport_name.rsplit(":", 1)
+
+        self.parsed_data["transport_details"].append(TransportDetails(
+            stage_qualifier=get_text_safe(elements, 1),
+            mode_of_transport=get_text_safe(elements, 3),
+            carrier_id=get_text_safe(elements[5].split(":::") if len(elements) > 5 else [""], 0),
+            carrier_name=get_text_safe(elements[5].split(":::") if len(elements) > 5 else [""], 1),
+            transport_id=transport_info[0],
+            transport_name=transport_name,
+            transport_nationality=transport_nationality
+        ))
+
+    def _parse_loc(self, elements):
+        loc_info = elements[2].split(":")
+        loc_name = ":".join(loc_info[3:]) if len(loc_info) > 3 else None
+        self.parsed_data["references"].append(Reference(
+            qualifier=get_text_safe(elements, 1),
+            number=get_text_safe(loc_info, 0)
+        ))
+        self.parsed_data["free_text"].append(FreeText(
+            qualifier=get_text_safe(elements, 1),
+            text=loc_name
+        ))
+
+    def _parse_nad(self, elements):
+        party_qualifier = get_text_safe(elements, 1)
+        party_id = get_text_safe(elements, 2).split(":")[0]
+        name = get_text_safe(elements, 3)
+        address = get_text_safe(elements, 5)  # address está en la posición 5
+        city = get_text_safe(elements, 6)    # city está en la posición 6
+        country = get_text_safe(elements, 9) # country está en la posición 9
+
+        self.parsed_data["name_and_address"].append(NameAndAddress(
+            party_qualifier=party_qualifier,
+            party_id=party_id,
+            name=name,
+            address=address if address else "",
+            city=city if city else "",
+            country=country if country else ""
+        ))
+
+    def _parse_gid(self, elements):
+        self.parsed_data["goods_item_details"].append(GoodsItemDetails(
+            item_number=get_text_safe(elements, 1),
+            number_of_packages=get_text_safe(elements, 2).split(":")[0] if get_text_safe(elements, 2) else None,
+            type_of_packages=get_text_safe(elements, 2).split(":")[1] if get_text_safe(elements, 2) and ":" in get_text_safe(elements, 2) else None
+        ))
+
+    def _parse_mea(self, elements):
+        measurement_info = get_text_safe(elements, 3).split(":")
+        self.parsed_data["measurements"].append(Measurements(
+            dimension_code=get_text_safe(elements, 2),
+            value=get_text_safe(measurement_info, 1) if len(measurement_info) > 1 else None
+        ))
+
+    def _parse_eqd(self, elements):
+        self.parsed_data["equipment_details"].append(EquipmentDetails(
+            qualifier=get_text_safe(elements, 1),
+            id_number=get_text_safe(elements, 2),
+            size_and_type=get_text_safe(elements, 3)
+        ))
+
+    _handlers = {
+        "UNB": _parse_unb,
+        "UNH": _parse_unh,
+        "BGM": _parse_bgm,
+        "DTM": _parse_dtm,
+        "FTX": _parse_ftx,
+        "RFF": _parse_rff,
+        "TDT": _parse_tdt,
+        "LOC": _parse_loc,
+        "NAD": _parse_nad,
+        "GID": _parse_gid,
+        "MEA": _parse_mea,
+        "EQD": _parse_eqd
     }
 
-    def get_text_safe(elements, index):
-        return elements[index] if index < len(elements) else None
-
-    try:
-        segments = edifact_message.strip().split("'")
-        sender_id, recipient_id = None, None
-
-        for segment in segments:
-            elements = segment.split("+")
-            tag = elements[0].split(":")[0].strip()
-
-            logger.debug(f"Parsing segment: {segment}")
-
-            if tag == "UNB":
-                sender_id = get_text_safe(elements[2].split(":"), 0)
-                recipient_id = get_text_safe(elements[3].split(":"), 0)
-            elif tag == "UNH":
-                parsed_data["message_header"].append(MessageHeader(
-                    sender_id=sender_id,
-                    recipient_id=recipient_id,
-                    message_reference_number=get_text_safe(elements, 1),
-                    message_type=get_text_safe(elements[2].split(":"), 0),
-                    version_number=get_text_safe(elements[2].split(":"), 1)
-                ))
-            elif tag == "BGM":
-                parsed_data["beginning_of_message"].append(BeginningOfMessage(
-                    message_name_code=get_text_safe(elements, 1),
-                    document_message_number=get_text_safe(elements, 2),
-                    message_function_code=get_text_safe(elements, 3)
-                ))
-            elif tag == "DTM":
-                date_time_info = get_text_safe(elements, 1).split(":")
-                parsed_data["date_time_period"].append(DateTimePeriod(
-                    qualifier=get_text_safe(date_time_info, 0),
-                    period=get_text_safe(date_time_info, 1)
-                ))
-            elif tag == "FTX":
-                parsed_data["free_text"].append(FreeText(
-                    qualifier=get_text_safe(elements, 1),
-                    text=get_text_safe(elements, 4)
-                ))
-            elif tag == "RFF":
-                reference_info = get_text_safe(elements, 1).split(":")
-                parsed_data["references"].append(Reference(
-                    qualifier=get_text_safe(reference_info, 0),
-                    number=get_text_safe(reference_info, 1)
-                ))
-            elif tag == "TDT":
-                transport_info = get_text_safe(elements, 8).split(":::") if len(elements) > 8 else ["", "", ""]
-                transport_name = transport_info[0]
-                transport_nationality = None
-                if ":" in transport_name:
-                    transport_name, transport_nationality = transport_name.rsplit(":", 1)
-
-                parsed_data["transport_details"].append(TransportDetails(
-                    stage_qualifier=get_text_safe(elements, 1),
-                    mode_of_transport=get_text_safe(elements, 3),
-                    carrier_id=get_text_safe(elements[5].split(":::") if len(elements) > 5 else [""], 0),
-                    carrier_name=get_text_safe(elements[5].split(":::") if len(elements) > 5 else [""], 1),
-                    transport_id=transport_info[0],
-                    transport_name=transport_name,
-                    transport_nationality=transport_nationality
-                ))
-            elif tag == "LOC":
-                loc_info = elements[2].split(":")
-                loc_name = ":".join(loc_info[3:]) if len(loc_info) > 3 else None
-                parsed_data["references"].append(Reference(
-                    qualifier=get_text_safe(elements, 1),
-                    number=get_text_safe(loc_info, 0)
-                ))
-                parsed_data["free_text"].append(FreeText(
-                    qualifier=get_text_safe(elements, 1),
-                    text=loc_name
-                ))
-            elif tag == "NAD":
-                party_qualifier = get_text_safe(elements, 1)
-                party_id = get_text_safe(elements, 2).split(":")[0]
-                name = get_text_safe(elements, 3)
-                address = get_text_safe(elements, 5)  # address está en la posición 5
-                city = get_text_safe(elements, 6)    # city está en la posición 6
-                country = get_text_safe(elements, 9) # country está en la posición 9
-
-                parsed_data["name_and_address"].append(NameAndAddress(
-                    party_qualifier=party_qualifier,
-                    party_id=party_id,
-                    name=name,
-                    address=address if address else "",
-                    city=city if city else "",
-                    country=country if country else ""
-                ))
-            elif tag == "GID":
-                parsed_data["goods_item_details"].append(GoodsItemDetails(
-                    item_number=get_text_safe(elements, 1),
-                    number_of_packages=get_text_safe(elements, 2).split(":")[0] if get_text_safe(elements, 2) else None,
-                    type_of_packages=get_text_safe(elements, 2).split(":")[1] if get_text_safe(elements, 2) and ":" in get_text_safe(elements, 2) else None
-                ))
-            elif tag == "MEA":
-                measurement_info = get_text_safe(elements, 3).split(":")
-                parsed_data["measurements"].append(Measurements(
-                    dimension_code=get_text_safe(elements, 2),
-                    value=get_text_safe(measurement_info, 1) if len(measurement_info) > 1 else None
-                ))
-            elif tag == "EQD":
-                parsed_data["equipment_details"].append(EquipmentDetails(
-                    qualifier=get_text_safe(elements, 1),
-                    id_number=get_text_safe(elements, 2),
-                    size_and_type=get_text_safe(elements, 3)
-                ))
-
-        logger.info("EDIFACT message parsed successfully")
-        return parsed_data
-    except Exception as e:
-        logger.error(f"Error parsing EDIFACT message: {e}")
-
-    return parsed_data
+def parse_edifact(edifact_message: str) -> dict:
+    return EdifactParser().parse(edifact_message)
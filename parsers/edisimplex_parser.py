@@ -1,7 +1,9 @@
 import logging
 from dataclasses import dataclass
 from typing import List, Optional
+from parsers import SECTIONS
 from utils.logger import logger
+from utils.text import iter_split
 
 @dataclass
 class MessageHeader:
@@ -71,138 +73,192 @@ def get_text_safe(elements, index):
     text = elements[index] if index < len(elements) else None
     return text.strip() if text else text
 
-def parse_edisimplex(edisimplex_message: str) -> dict:
-    parsed_data = {
-        "message_header": [],
-        "beginning_of_message": [],
-        "date_time_period": [],
-        "free_text": [],
-        "references": [],
-        "transport_details": [],
-        "name_and_address": [],
-        "goods_item_details": [],
-        "measurements": [],
-        "equipment_details": []
+class EdisimplexParser:
+    """Parses EDISIMPLEX messages line by line."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears the state left by the previous message."""
+        self.parsed_data = {section: [] for section in SECTIONS}
+
+    def parse(self, edisimplex_message: str) -> dict:
+        return self._parse_lines(edisimplex_message.strip().split('\n'))
+
+    def parse_stream(self, edisimplex_message: str) -> dict:
+        """Same as parse(), but splits the lines lazily."""
+        return self._parse_lines(iter_split(edisimplex_message.strip(), '\n'))
+
+    def _parse_lines(self, lines):
+        self.reset()
+        handlers = self._handlers
+
+        try:
+            for line in lines:
+                elements = line.split('^')
+                tag = elements[0].strip()
+
+                logger.debug(f"Parsing segment: {line}")
+
+                handler = handlers.get(tag)
+                if handler is not None:
+                    handler(self, elements)
+
+            logger.info("EDISIMPLEX message parsed successfully")
+        except Exception as e:
+            logger.error(f"Error parsing EDISIMPLEX message: {e}")
+
+        return self.parsed_data
+
+    def parse_many(self, edisimplex_messages):
+        """Parses an iterable of messages, yielding one parsed_data dict per message."""
+        for edisimplex_message in edisimplex_messages:
+            yield self.parse(edisimplex_message)
+
+    def _parse_env001(self, elements):
+        sender_id = get_text_safe(elements, 1)
+        recipient_id = get_text_safe(elements, 2)
+        self.parsed_data["message_header"].append(MessageHeader(
+            sender_id=sender_id,
+            recipient_id=recipient_id
+        ))
+
+    def _parse_cope02000(self, elements):
+        self.parsed_data["beginning_of_message"].append(BeginningOfMessage(
+            document_message_number=get_text_safe(elements, 1),
+            message_function_code=None
+        ))
+
+    def _parse_cope02001(self, elements):
+        self.parsed_data["beginning_of_message"][0].message_name_code = "135"
+        self.parsed_data["beginning_of_message"][0].document_message_number = get_text_safe(elements, 1)
+        self.parsed_data["beginning_of_message"][0].message_function_code = get_text_safe(elements, 2)
+
+    def _parse_cope02002(self, elements):
+        self.parsed_data["date_time_period"].append(DateTimePeriod(
+            qualifier="137",
+            period=get_text_safe(elements, 1)
+        ))
+
+    def _parse_cope02003(self, elements):
+        self.parsed_data["free_text"].append(FreeText(
+            qualifier=get_text_safe(elements, 1),
+            text=get_text_safe(elements, 2)
+        ))
+
+    def _parse_cope02004(self, elements):
+        self.parsed_data["references"].append(Reference(
+            qualifier=get_text_safe(elements, 1),
+            number=get_text_safe(elements, 2)
+        ))
+
+    def _parse_cope02005(self, elements):
+        self.parsed_data["transport_details"].append(TransportDetails(
+            stage_qualifier=get_text_safe(elements, 1),
+            mode_of_transport=get_text_safe(elements, 2),
+            carrier_id=get_text_safe(elements, 3),
+            carrier_name=get_text_safe(elements, 4),
+            transport_id=get_text_safe(elements, 5),
+            transport_name=get_text_safe(elements, 6),
+            transport_nationality=None
+        ))
+
+    def _parse_cope02006(self, elements):
+        self.parsed_data["references"].append(Reference(
+            qualifier=get_text_safe(elements, 1),
+            number=get_text_safe(elements, 2)
+        ))
+        if len(elements) > 3:
+            self.parsed_data["free_text"].append(FreeText(
+                qualifier=get_text_safe(elements, 1),
+                text=get_text_safe(elements, 3)
+            ))
+
+    def _parse_cope02007(self, elements):
+        self.parsed_data["date_time_period"].append(DateTimePeriod(
+            qualifier="133",
+            period=get_text_safe(elements, 1)
+        ))
+
+    def _parse_cope02008(self, elements):
+        self.parsed_data["name_and_address"].append(NameAndAddress(
+            party_qualifier=get_text_safe(elements, 1),
+            party_id=get_text_safe(elements, 2),
+            name=get_text_safe(elements, 3),
+            address=get_text_safe(elements, 4) if len(elements) > 4 else "",
+            city=get_text_safe(elements, 5) if len(elements) > 5 else "",
+            country=get_text_safe(elements, 6) if len(elements) > 6 else ""
+        ))
+
+    def _parse_cope02010(self, elements):
+        self.parsed_data["goods_item_details"].append(GoodsItemDetails(
+            item_number=get_text_safe(elements, 1),
+            number_of_packages=get_text_safe(elements, 2),
+            type_of_packages=get_text_safe(elements, 3)
+        ))
+
+    def _parse_cope02011(self, elements):
+        self.parsed_data["free_text"].append(FreeText(
+            qualifier=None,
+            text=get_text_safe(elements, 1)
+        ))
+
+    def _parse_cope02012(self, elements):
+        self.parsed_data["free_text"].append(FreeText(
+            qualifier=get_text_safe(elements, 1),
+            text=get_text_safe(elements, 2)
+        ))
+
+    def _parse_cope02013(self, elements):
+        self.parsed_data["measurements"].append(Measurements(
+            dimension_code=None,
+            value=get_text_safe(elements, 1)
+        ))
+
+    def _parse_cope02014(self, elements):
+        self.parsed_data["references"].append(Reference(
+            qualifier=get_text_safe(elements, 1),
+            number=get_text_safe(elements, 2)
+        ))
+
+    def _parse_cope02017(self, elements):
+        self.parsed_data["equipment_details"].append(EquipmentDetails(
+            qualifier=get_text_safe(elements, 1),
+            id_number=get_text_safe(elements, 2),
+            size_and_type=get_text_safe(elements, 3)
+        ))
+
+    def _parse_cope02018(self, elements):
+        self.parsed_data["references"].append(Reference(
+            qualifier=None,
+            number=get_text_safe(elements, 1)
+        ))
+
+    def _parse_cope02024(self, elements):
+        # No details provided for COPE02024 in the example
+        pass
+
+    _handlers = {
+        "ENV001": _parse_env001,
+        "COPE02000": _parse_cope02000,
+        "COPE02001": _parse_cope02001,
+        "COPE02002": _parse_cope02002,
+        "COPE02003": _parse_cope02003,
+        "COPE02004": _parse_cope02004,
+        "COPE02005": _parse_cope02005,
+        "COPE02006": _parse_cope02006,
+        "COPE02007": _parse_cope02007,
+        "COPE02008": _parse_cope02008,
+        "COPE02010": _parse_cope02010,
+        "COPE02011": _parse_cope02011,
+        "COPE02012": _parse_cope02012,
+        "COPE02013": _parse_cope02013,
+        "COPE02014": _parse_cope02014,
+        "COPE02017": _parse_cope02017,
+        "COPE02018": _parse_cope02018,
+        "COPE02024": _parse_cope02024
     }
 
-    lines = edisimplex_message.strip().split('\n')
-
-    try:
-        for line in lines:
-            elements = line.split('^')
-            tag = elements[0].strip()
-
-            logger.debug(f"Parsing segment: {line}")
-
-            if tag == "ENV001":
-                sender_id = get_text_safe(elements, 1)
-                recipient_id = get_text_safe(elements, 2)
-                parsed_data["message_header"].append(MessageHeader(
-                    sender_id=sender_id,
-                    recipient_id=recipient_id
-                ))
-            elif tag == "COPE02000":
-                parsed_data["beginning_of_message"].append(BeginningOfMessage(
-                    document_message_number=get_text_safe(elements, 1),
-                    message_function_code=None
-                ))
-            elif tag == "COPE02001":
-                parsed_data["beginning_of_message"][0].message_name_code = "135"
-                parsed_data["beginning_of_message"][0].document_message_number = get_text_safe(elements, 1)
-                parsed_data["beginning_of_message"][0].message_function_code = get_text_safe(elements, 2)
-            elif tag == "COPE02002":
-                parsed_data["date_time_period"].append(DateTimePeriod(
-                    qualifier="137",
-                    period=get_text_safe(elements, 1)
-                ))
-            elif tag == "COPE02003":
-                parsed_data["free_text"].append(FreeText(
-                    qualifier=get_text_safe(elements, 1),
-                    text=get_text_safe(elements, 2)
-                ))
-            elif tag == "COPE02004":
-                parsed_data["references"].append(Reference(
-                    qualifier=get_text_safe(elements, 1),
-                    number=get_text_safe(elements, 2)
-                ))
-            elif tag == "COPE02005":
-                parsed_data["transport_details"].append(TransportDetails(
-                    stage_qualifier=get_text_safe(elements, 1),
-                    mode_of_transport=get_text_safe(elements, 2),
-                    carrier_id=get_text_safe(elements, 3),
-                    carrier_name=get_text_safe(elements, 4),
-                    transport_id=get_text_safe(elements, 5),
-                    transport_name=get_text_safe(elements, 6),
-                    transport_nationality=None
-                ))
-            elif tag == "COPE02006":
-                parsed_data["references"].append(Reference(
-                    qualifier=get_text_safe(elements, 1),
-                    number=get_text_safe(elements, 2)
-                ))
-                if len(elements) > 3:
-                    parsed_data["free_text"].append(FreeText(
-                        qualifier=get_text_safe(elements, 1),
-                        text=get_text_safe(elements, 3)
-                    ))
-            elif tag == "COPE02007":
-                parsed_data["date_time_period"].append(DateTimePeriod(
-                    qualifier="133",
-                    period=get_text_safe(elements, 1)
-                ))
-            elif tag == "COPE02008":
-                parsed_data["name_and_address"].append(NameAndAddress(
-                    party_qualifier=get_text_safe(elements, 1),
-                    party_id=get_text_safe(elements, 2),
-                    name=get_text_safe(elements, 3),
-                    address=get_text_safe(elements, 4) if len(elements) > 4 else "",
-                    city=get_text_safe(elements, 5) if len(elements) > 5 else "",
-                    country=get_text_safe(elements, 6) if len(elements) > 6 else ""
-                ))
-            elif tag == "COPE02010":
-                parsed_data["goods_item_details"].append(GoodsItemDetails(
-                    item_number=get_text_safe(elements, 1),
-                    number_of_packages=get_text_safe(elements, 2),
-                    type_of_packages=get_text_safe(elements, 3)
-                ))
-            elif tag == "COPE02011":
-                parsed_data["free_text"].append(FreeText(
-                    qualifier=None,
-                    text=get_text_safe(elements, 1)
-                ))
-            elif tag == "COPE02012":
-                parsed_data["free_text"].append(FreeText(
-                    qualifier=get_text_safe(elements, 1),
-                    text=get_text_safe(elements, 2)
-                ))
-            elif tag == "COPE02013":
-                parsed_data["measurements"].append(Measurements(
-                    dimension_code=None,
-                    value=get_text_safe(elements, 1)
-                ))
-            elif tag == "COPE02014":
-                parsed_data["references"].append(Reference(
-                    qualifier=get_text_safe(elements, 1),
-                    number=get_text_safe(elements, 2)
-                ))
-            elif tag == "COPE02017":
-                parsed_data["equipment_details"].append(EquipmentDetails(
-                    qualifier=get_text_safe(elements, 1),
-                    id_number=get_text_safe(elements, 2),
-                    size_and_type=get_text_safe(elements, 3)
-                ))
-            elif tag == "COPE02018":
-                parsed_data["references"].append(Reference(
-                    qualifier=None,
-                    number=get_text_safe(elements, 1)
-                ))
-            elif tag == "COPE02024":
-                # No details provided for COPE02024 in the example
-                pass
-
-        logger.info("EDISIMPLEX message parsed successfully")
-        return parsed_data
-    except Exception as e:
-        logger.error(f"Error parsing EDISIMPLEX message: {e}")
-
-    return parsed_data
+def parse_edisimplex(edisimplex_message: str) -> dict:
+    return EdisimplexParser().parse(edisimplex_message)
@@ -0,0 +1,310 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from utils.logger import logger
+
+# EDISIMPLEX COPE02013 only carries the gross weight value, without a dimension code
+EDISIMPLEX_DIMENSION_CODE = "WT"
+
+# Canonical records are frozen and slotted so large batches stay compact and
+# whole messages can be hashed for dedup or used as join keys.
+
+class FrozenRecord:
+    """Base for the canonical records.
+
+    The default pickle and copy support restores slots with setattr(), which
+    frozen dataclasses reject, so the state is restored through object.__setattr__.
+    """
+    __slots__ = ()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+@dataclass(frozen=True)
+class MessageHeader(FrozenRecord):
+    __slots__ = ("sender_id", "recipient_id", "message_reference_number", "message_type", "version_number")
+    sender_id: Optional[str]
+    recipient_id: Optional[str]
+    message_reference_number: Optional[str]
+    message_type: Optional[str]
+    version_number: Optional[str]
+
+@dataclass(frozen=True)
+class BeginningOfMessage(FrozenRecord):
+    __slots__ = ("message_name_code", "document_message_number", "message_function_code")
+    message_name_code: Optional[str]
+    document_message_number: Optional[str]
+    message_function_code: Optional[str]
+
+@dataclass(frozen=True)
+class DateTimePeriod(FrozenRecord):
+    __slots__ = ("qualifier", "period")
+    qualifier: Optional[str]
+    period: Optional[str]
+
+@dataclass(frozen=True)
+class FreeText(FrozenRecord):
+    __slots__ = ("qualifier", "text")
+    qualifier: Optional[str]
+    text: Optional[str]
+
+@dataclass(frozen=True)
+class Reference(FrozenRecord):
+    __slots__ = ("qualifier", "number")
+    qualifier: Optional[str]
+    number: Optional[str]
+
+@dataclass(frozen=True)
+class TransportDetails(FrozenRecord):
+    __slots__ = ("stage_qualifier", "mode_of_transport", "carrier_id", "carrier_name",
+                 "transport_id", "transport_name", "transport_nationality")
+    stage_qualifier: Optional[str]
+    mode_of_transport: Optional[str]
+    carrier_id: Optional[str]
+    carrier_name: Optional[str]
+    transport_id: Optional[str]
+    transport_name: Optional[str]
+    transport_nationality: Optional[str]
+
+@dataclass(frozen=True)
+class NameAndAddress(FrozenRecord):
+    __slots__ = ("party_qualifier", "party_id", "name", "address", "city", "country")
+    party_qualifier: Optional[str]
+    party_id: Optional[str]
+    name: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    country: Optional[str]
+
+@dataclass(frozen=True)
+class GoodsItemDetails(FrozenRecord):
+    __slots__ = ("item_number", "number_of_packages", "type_of_packages")
+    item_number: Optional[str]
+    number_of_packages: Optional[str]
+    type_of_packages: Optional[str]
+
+@dataclass(frozen=True)
+class Measurements(FrozenRecord):
+    __slots__ = ("dimension_code", "value")
+    dimension_code: Optional[str]
+    value: Optional[str]
+
+@dataclass(frozen=True)
+class EquipmentDetails(FrozenRecord):
+    __slots__ = ("qualifier", "id_number", "size_and_type")
+    qualifier: Optional[str]
+    id_number: Optional[str]
+    size_and_type: Optional[str]
+
+@dataclass(frozen=True)
+class CanonicalMessage(FrozenRecord):
+    __slots__ = ("source_format", "message_header", "beginning_of_message", "date_time_period",
+                 "free_text", "references", "transport_details", "name_and_address",
+                 "goods_item_details", "measurements", "equipment_details")
+    source_format: str
+    message_header: Tuple[MessageHeader, ...]
+    beginning_of_message: Tuple[BeginningOfMessage, ...]
+    date_time_period: Tuple[DateTimePeriod, ...]
+    free_text: Tuple[FreeText, ...]
+    references: Tuple[Reference, ...]
+    transport_details: Tuple[TransportDetails, ...]
+    name_and_address: Tuple[NameAndAddress, ...]
+    goods_item_details: Tuple[GoodsItemDetails, ...]
+    measurements: Tuple[Measurements, ...]
+    equipment_details: Tuple[EquipmentDetails, ...]
+
+class CodeInterner:
+    """Per-domain tables that map every code value to a single string object.
+
+    With max_values set, a domain stops taking new values once it holds that
+    many; further values are returned as-is instead of being stored, so a
+    long-lived interner cannot grow without bound.
+    """
+
+    def __init__(self, max_values: Optional[int] = None):
+        self.max_values = max_values
+        self._tables: Dict[str, Dict[str, str]] = {}
+
+    def intern(self, domain: str, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        table = self._tables.get(domain)
+        if table is None:
+            table = self._tables[domain] = {}
+        interned = table.get(value)
+        if interned is not None:
+            return interned
+        if self.max_values is not None and len(table) >= self.max_values:
+            return value
+        table[value] = value
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of distinct values held per domain."""
+        return {domain: len(table) for domain, table in self._tables.items()}
+
+    def clear(self):
+        self._tables.clear()
+
+def keep_code(domain: str, value: Optional[str]) -> Optional[str]:
+    """Stand-in for CodeInterner.intern when no interner is given."""
+    return value
+
+def clean_text(value: Optional[str]) -> Optional[str]:
+    """Strips surrounding whitespace and maps empty values to None."""
+    if value is None:
+        return None
+    value = value.strip()
+    return value if value else None
+
+def entry_text(entry, name: str) -> Optional[str]:
+    """Reads a field from a parser dataclass, tolerating fields a format does not define."""
+    return clean_text(getattr(entry, name, None))
+
+def split_transport_identification(transport_id, transport_name, transport_nationality):
+    """Splits an EDIFACT TDT C222 composite (id:list:agency:name:nationality) into its parts.
+
+    EdifactParser copies the id into transport_name when the composite has no
+    name, so a name equal to the id is treated as missing.
+    """
+    if transport_id is not None and ":" in transport_id:
+        parts = transport_id.split(":")
+        transport_id = parts[0]
+        transport_name = parts[3] if len(parts) > 3 else None
+        transport_nationality = parts[4] if len(parts) > 4 else None
+    if transport_name == transport_id:
+        transport_name = None
+    return transport_id, transport_name, transport_nationality
+
+def split_carrier_identification(carrier_id, carrier_name):
+    """Splits an EDIFACT TDT C040 composite (id:list:agency:name) into id and name."""
+    if carrier_id is None or ":" not in carrier_id:
+        return carrier_id, carrier_name
+    parts = carrier_id.split(":")
+    name = parts[3] if len(parts) > 3 and parts[3] else carrier_name
+    return parts[0], name
+
+def normalize(parsed_data: dict, format_type: str, interner: Optional[CodeInterner] = None) -> CanonicalMessage:
+    """Maps the parsed_data of any of the three parsers into a CanonicalMessage.
+
+    Code values are only interned when an interner is given. The caller owns
+    its lifetime, e.g. one per batch, or a bounded one for a long-running consumer.
+    """
+    code = interner.intern if interner is not None else keep_code
+    field = entry_text
+
+    message_header = tuple(MessageHeader(
+        sender_id=code("party", field(h, "sender_id")),
+        recipient_id=code("party", field(h, "recipient_id")),
+        message_reference_number=field(h, "message_reference_number"),
+        message_type=code("message_type", field(h, "message_type")),
+        version_number=code("version", field(h, "version_number"))
+    ) for h in parsed_data.get("message_header", []))
+
+    beginning_of_message = tuple(BeginningOfMessage(
+        message_name_code=code("qualifier", field(b, "message_name_code")),
+        document_message_number=field(b, "document_message_number"),
+        message_function_code=code("qualifier", field(b, "message_function_code"))
+    ) for b in parsed_data.get("beginning_of_message", []))
+
+    date_time_period = tuple(DateTimePeriod(
+        qualifier=code("qualifier", field(d, "qualifier")),
+        period=field(d, "period")
+    ) for d in parsed_data.get("date_time_period", []))
+
+    # EDIFACT and XML add a text-less entry for every LOC, EDISIMPLEX only one with a name
+    free_text = tuple(FreeText(
+        qualifier=code("qualifier", field(f, "qualifier")),
+        text=field(f, "text")
+    ) for f in parsed_data.get("free_text", []) if field(f, "text") is not None)
+
+    references = tuple(Reference(
+        qualifier=code("qualifier", field(r, "qualifier")),
+        number=field(r, "number")
+    ) for r in parsed_data.get("references", []))
+
+    transport_details = []
+    for t in parsed_data.get("transport_details", []):
+        transport_id = field(t, "transport_id")
+        transport_name = field(t, "transport_name")
+        transport_nationality = field(t, "transport_nationality")
+        carrier_id = field(t, "carrier_id")
+        carrier_name = field(t, "carrier_name")
+        if format_type == "EDIFACT":
+            transport_id, transport_name, transport_nationality = split_transport_identification(
+                transport_id, transport_name, transport_nationality)
+            carrier_id, carrier_name = split_carrier_identification(carrier_id, carrier_name)
+        transport_details.append(TransportDetails(
+            stage_qualifier=code("qualifier", field(t, "stage_qualifier")),
+            mode_of_transport=code("qualifier", field(t, "mode_of_transport")),
+            carrier_id=code("carrier", clean_text(carrier_id)),
+            carrier_name=code("carrier_name", clean_text(carrier_name)),
+            transport_id=clean_text(transport_id),
+            transport_name=clean_text(transport_name),
+            transport_nationality=code("country", clean_text(transport_nationality))
+        ))
+
+    name_and_address = tuple(NameAndAddress(
+        party_qualifier=code("qualifier", field(n, "party_qualifier")),
+        party_id=code("party", field(n, "party_id")),
+        name=field(n, "name"),
+        address=field(n, "address"),
+        city=field(n, "city"),
+        country=code("country", field(n, "country"))
+    ) for n in parsed_data.get("name_and_address", []))
+
+    goods_item_details = tuple(GoodsItemDetails(
+        item_number=field(g, "item_number"),
+        number_of_packages=field(g, "number_of_packages"),
+        type_of_packages=code("package_type", field(g, "type_of_packages"))
+    ) for g in parsed_data.get("goods_item_details", []))
+
+    measurements = []
+    for m in parsed_data.get("measurements", []):
+        dimension_code = field(m, "dimension_code")
+        if dimension_code is None and format_type == "EDISIMPLEX":
+            dimension_code = EDISIMPLEX_DIMENSION_CODE
+        measurements.append(Measurements(
+            dimension_code=code("qualifier", dimension_code),
+            value=field(m, "value")
+        ))
+
+    equipment_details = []
+    for e in parsed_data.get("equipment_details", []):
+        size_and_type = field(e, "size_and_type")
+        if size_and_type is not None and format_type == "EDIFACT":
+            # EQD C224 carries the code list qualifier and agency after the size/type code
+            size_and_type = clean_text(size_and_type.split(":")[0])
+        equipment_details.append(EquipmentDetails(
+            qualifier=code("qualifier", field(e, "qualifier")),
+            id_number=field(e, "id_number"),
+            size_and_type=code("size_and_type", size_and_type)
+        ))
+
+    return CanonicalMessage(
+        source_format=code("format", format_type),
+        message_header=message_header,
+        beginning_of_message=beginning_of_message,
+        date_time_period=date_time_period,
+        free_text=free_text,
+        references=references,
+        transport_details=tuple(transport_details),
+        name_and_address=name_and_address,
+        goods_item_details=goods_item_details,
+        measurements=tuple(measurements),
+        equipment_details=tuple(equipment_details)
+    )
+
+def normalize_many(messages: Iterable[Tuple[dict, str]], interner: Optional[CodeInterner] = None):
+    """Normalizes (parsed_data, format_type) pairs, sharing one interner across the batch.
+
+    Without an interner, a new one is created for this batch and dropped with it.
+    """
+    if interner is None:
+        interner = CodeInterner()
+    for parsed_data, format_type in messages:
+        yield normalize(parsed_data, format_type, interner)
+    logger.debug(f"Interned code values per domain: {interner.stats()}")
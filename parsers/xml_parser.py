@@ -1,6 +1,7 @@
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass
 from typing import Optional
+from parsers import SECTIONS
 from utils.logger import logger
 
 @dataclass
@@ -71,29 +72,122 @@ class EquipmentDetails:
 def get_text_safe(element: Optional[ET.Element]) -> Optional[str]:
     return element.text if element is not None else None
 
-def parse_xml(xml_message: str) -> dict:
-    parsed_data = {
-        "message_header": [],
-        "beginning_of_message": [],
-        "date_time_period": [],
-        "free_text": [],
-        "references": [],
-        "transport_details": [],
-        "name_and_address": [],
-        "goods_item_details": [],
-        "measurements": [],
-        "equipment_details": []
-    }
-
-    try:
-        root = ET.fromstring(xml_message)
-    except ET.ParseError as e:
-        logger.error(f"Error parsing XML: {e}")
-        return parsed_data
-
-    try:
+# Characters fed to the pull parser at a time by XmlParser.parse_stream()
+STREAM_FEED_SIZE = 64 * 1024
+
+def iter_pull_events(xml_message: str):
+    """Yields the start/end events of the message, feeding it to a pull parser
+    STREAM_FEED_SIZE characters at a time."""
+    pull_parser = ET.XMLPullParser(events=("start", "end"))
+    for offset in range(0, len(xml_message), STREAM_FEED_SIZE):
+        pull_parser.feed(xml_message[offset:offset + STREAM_FEED_SIZE])
+        yield from pull_parser.read_events()
+    pull_parser.close()
+    yield from pull_parser.read_events()
+
+class XmlParser:
+    """Parses EDIXML messages group by group."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears the state left by the previous message."""
+        self.parsed_data = {section: [] for section in SECTIONS}
+
+    def parse(self, xml_message: str) -> dict:
+        self.reset()
+
+        try:
+            root = ET.fromstring(xml_message)
+        except ET.ParseError as e:
+            logger.error(f"Error parsing XML: {e}")
+            return self.parsed_data
+
+        try:
+            self._parse_header(root.find('COPARNE02.HEADER'))
+
+            for group_tag, handler in self._group_handlers:
+                for group in root.findall(group_tag):
+                    handler(self, group)
+
+            logger.info("XML parsed successfully")
+        except AttributeError as e:
+            logger.error(f"Error parsing element: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+
+        return self.parsed_data
+
+    def parse_stream(self, xml_message: str) -> dict:
+        """Same output as parse(), but frees each top-level group once it is handled."""
+        # Entries are collected per group tag and merged in the order parse()
+        # visits the tags, cut at the first failing group as parse() would be
+        self.reset()
+        handlers = self._stream_handlers
+        collected = {}
+        failed_rank = None
+        error = None
+        root = None
+        depth = 0
+
+        try:
+            for event, element in iter_pull_events(xml_message):
+                if event == "start":
+                    if root is None:
+                        root = element
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+
+                rank, handler = handlers.get(element.tag, (None, None))
+                # parse() stops at its first error and only reads the first header
+                if handler is not None and (failed_rank is None or rank < failed_rank) \
+                        and not (rank == 0 and rank in collected):
+                    self.parsed_data = collected.setdefault(rank, {section: [] for section in SECTIONS})
+                    try:
+                        handler(self, element)
+                    except Exception as e:
+                        failed_rank, error = rank, e
+                root.clear()
+        except ET.ParseError as e:
+            logger.error(f"Error parsing XML: {e}")
+            self.reset()
+            return self.parsed_data
+
+        if 0 not in collected:
+            # Fails the same way parse() does on a message without a header
+            self.parsed_data = collected.setdefault(0, {section: [] for section in SECTIONS})
+            try:
+                self._parse_header(None)
+            except Exception as e:
+                failed_rank, error = 0, e
+
+        self.reset()
+        for rank in sorted(collected):
+            if failed_rank is not None and rank > failed_rank:
+                break
+            for section, entries in collected[rank].items():
+                self.parsed_data[section].extend(entries)
+
+        if error is None:
+            logger.info("XML parsed successfully")
+        elif isinstance(error, AttributeError):
+            logger.error(f"Error parsing element: {error}")
+        else:
+            logger.error(f"Unexpected error: {error}")
+
+        return self.parsed_data
+
+    def parse_many(self, xml_messages):
+        """Parses an iterable of messages, yielding one parsed_data dict per message."""
+        for xml_message in xml_messages:
+            yield self.parse(xml_message)
+
+    def _parse_header(self, header):
         # Parse Message Header
-        header = root.find('COPARNE02.HEADER')
         if header is not None:
             interchange_header = header.find('anxs_interchange.header')
             sender_id = get_text_safe(interchange_header.find('anxe_sender.identification'))
@@ -105,7 +199,7 @@ def parse_xml(xml_message: str) -> dict:
                 message_type = get_text_safe(message_header.find('anxe_message.type'))
                 version_number = get_text_safe(message_header.find('anxe_message.version.number'))
 
-                parsed_data["message_header"].append(MessageHeader(
+                self.parsed_data["message_header"].append(MessageHeader(
                     sender_id=sender_id,
                     recipient_id=recipient_id,
                     message_reference_number=message_reference_number,
@@ -120,7 +214,7 @@ def parse_xml(xml_message: str) -> dict:
             document_message_number = get_text_safe(beginning_of_message.find('tred_document.message.number'))
             message_function_code = get_text_safe(beginning_of_message.find('tred_message.function.coded'))
 
-            parsed_data["beginning_of_message"].append(BeginningOfMessage(
+            self.parsed_data["beginning_of_message"].append(BeginningOfMessage(
                 message_name_code=message_name_code,
                 document_message_number=document_message_number,
                 message_function_code=message_function_code
@@ -128,134 +222,137 @@ def parse_xml(xml_message: str) -> dict:
 
         # Parse Date/Time Periods
         for dtm in header.findall('trcd_date.time.period'):
-            qualifier = get_text_safe(dtm.find('tred_date.time.period.qualifier'))
-            period = get_text_safe(dtm.find('tred_date.time.period'))
-            parsed_data["date_time_period"].append(DateTimePeriod(qualifier=qualifier, period=period))
+            self._parse_date_time_period(dtm)
 
         # Parse Free Texts
         for ftx in header.findall('trsd_free.text'):
             qualifier = get_text_safe(ftx.find('tred_text.subject.qualifier'))
             text = get_text_safe(ftx.find('trcd_text.literal/tred_free.text'))
-            parsed_data["free_text"].append(FreeText(qualifier=qualifier, text=text))
-
-        # Parse References
-        for group in root.findall('COPARNE02.GROUP1'):
-            for rff in group.findall('trcd_reference'):
-                qualifier = get_text_safe(rff.find('tred_reference.qualifier'))
-                number = get_text_safe(rff.find('tred_reference.number'))
-                parsed_data["references"].append(Reference(qualifier=qualifier, number=number))
-
-        # Parse Transport Details
-        for group in root.findall('COPARNE02.GROUP2'):
-            transport = group.find('trsd_details.of.transport')
-            if transport is not None:
-                stage_qualifier = get_text_safe(transport.find('tred_transport.stage.qualifier'))
-                mode_of_transport = get_text_safe(transport.find('tred_mode.of.transport.coded'))
-                carrier = transport.find('trcd_carrier')
-                carrier_id = get_text_safe(carrier.find('tred_carrier.identification'))
-                carrier_name = get_text_safe(carrier.find('tred_carrier.name'))
-                transport_id = get_text_safe(transport.find('trcd_transport.identification/tred_id.of.the.means.of.transport'))
-                transport_name = get_text_safe(transport.find('trcd_transport.identification/tred_id.of.means.of.transport.identification'))
-                transport_nationality = get_text_safe(transport.find('trcd_transport.identification/tred_nationality.of.means.of.transport.coded'))
-
-                parsed_data["transport_details"].append(TransportDetails(
-                    stage_qualifier=stage_qualifier,
-                    mode_of_transport=mode_of_transport,
-                    carrier_id=carrier_id,
-                    carrier_name=carrier_name,
-                    transport_id=transport_id,
-                    transport_name=transport_name,
-                    transport_nationality=transport_nationality
-                ))
-
-            for loc in group.findall('trcd_location.identification'):
-                place_location_qualifier = get_text_safe(loc.find('tred_place.location.qualifier'))
-                place_location_identification = get_text_safe(loc.find('tred_place.location.identification'))
-                place_location = get_text_safe(loc.find('tred_place.location'))
-                parsed_data["references"].append(Reference(qualifier=place_location_qualifier, number=place_location_identification))
-                parsed_data["free_text"].append(FreeText(qualifier=place_location_qualifier, text=place_location))
-
-            for dtm in group.findall('trcd_date.time.period'):
-                qualifier = get_text_safe(dtm.find('tred_date.time.period.qualifier'))
-                period = get_text_safe(dtm.find('tred_date.time.period'))
-                parsed_data["date_time_period"].append(DateTimePeriod(qualifier=qualifier, period=period))
-
-        # Parse Name and Address
-        for group in root.findall('COPARNE02.GROUP3'):
-            name_and_address = group.find('trsd_name.and.address')
-            if name_and_address is not None:
-                party_qualifier = get_text_safe(name_and_address.find('tred_party.qualifier'))
-                party_id = get_text_safe(name_and_address.find('tred_party.id.identification'))
-                name = get_text_safe(name_and_address.find('tred_name.and.address.line'))
-                address = get_text_safe(name_and_address.find('tred_street.and.number.p.o.box'))
-                city = get_text_safe(name_and_address.find('tred_city.name'))
-                country = get_text_safe(name_and_address.find('tred_country.coded'))
-
-                parsed_data["name_and_address"].append(NameAndAddress(
-                    party_qualifier=party_qualifier,
-                    party_id=party_id,
-                    name=name,
-                    address=address,
-                    city=city,
-                    country=country
-                ))
-
-        # Parse Goods Item Details
-        for group in root.findall('COPARNE02.GROUP5'):
-            goods_item = group.find('trsd_goods.item.details')
-            if goods_item is not None:
-                item_number = get_text_safe(goods_item.find('tred_goods.item.number'))
-                number_of_packages = get_text_safe(goods_item.find('tred_number.of.packages'))
-                type_of_packages = get_text_safe(goods_item.find('tred_type.of.packages.identification'))
-
-                parsed_data["goods_item_details"].append(GoodsItemDetails(
-                    item_number=item_number,
-                    number_of_packages=number_of_packages,
-                                       type_of_packages=type_of_packages
-                ))
+            self.parsed_data["free_text"].append(FreeText(qualifier=qualifier, text=text))
+
+    def _parse_references(self, group):
+        for rff in group.findall('trcd_reference'):
+            qualifier = get_text_safe(rff.find('tred_reference.qualifier'))
+            number = get_text_safe(rff.find('tred_reference.number'))
+            self.parsed_data["references"].append(Reference(qualifier=qualifier, number=number))
+
+    def _parse_transport(self, group):
+        transport = group.find('trsd_details.of.transport')
+        if transport is not None:
+            stage_qualifier = get_text_safe(transport.find('tred_transport.stage.qualifier'))
+            mode_of_transport = get_text_safe(transport.find('tred_mode.of.transport.coded'))
+            carrier = transport.find('trcd_carrier')
+            carrier_id = get_text_safe(carrier.find('tred_carrier.identification'))
+            carrier_name = get_text_safe(carrier.find('tred_carrier.name'))
+            transport_id = get_text_safe(transport.find('trcd_transport.identification/tred_id.of.the.means.of.transport'))
+            transport_name = get_text_safe(transport.find('trcd_transport.identification/tred_id.of.means.of.transport.identification'))
+            transport_nationality = get_text_safe(transport.find('trcd_transport.identification/tred_nationality.of.means.of.transport.coded'))
+
+            self.parsed_data["transport_details"].append(TransportDetails(
+                stage_qualifier=stage_qualifier,
+                mode_of_transport=mode_of_transport,
+                carrier_id=carrier_id,
+                carrier_name=carrier_name,
+                transport_id=transport_id,
+                transport_name=transport_name,
+                transport_nationality=transport_nationality
+            ))
 
-            # Parse Measurements
-            for mea in group.findall('trsd_measurements'):
-                dimension_code = get_text_safe(mea.find('tred_measurement.dimension.coded'))
-                value = get_text_safe(mea.find('tred_measurement.value'))
-                parsed_data["measurements"].append(Measurements(dimension_code=dimension_code, value=value))
-
-            # Parse Split Goods Placement
-            for split_goods in group.findall('COPARNE02.GROUP7/trsd_split.goods.placement'):
-                equipment_id = get_text_safe(split_goods.find('tred_equipment.identification.number'))
-                num_packages = get_text_safe(split_goods.find('tred_number.of.packages'))
-                parsed_data["goods_item_details"].append(GoodsItemDetails(
-                    item_number=equipment_id,
-                    number_of_packages=num_packages,
-                    type_of_packages=""
-                ))
+        for loc in group.findall('trcd_location.identification'):
+            place_location_qualifier = get_text_safe(loc.find('tred_place.location.qualifier'))
+            place_location_identification = get_text_safe(loc.find('tred_place.location.identification'))
+            place_location = get_text_safe(loc.find('tred_place.location'))
+            self.parsed_data["references"].append(Reference(qualifier=place_location_qualifier, number=place_location_identification))
+            self.parsed_data["free_text"].append(FreeText(qualifier=place_location_qualifier, text=place_location))
+
+        for dtm in group.findall('trcd_date.time.period'):
+            self._parse_date_time_period(dtm)
+
+    def _parse_name_and_address(self, group):
+        name_and_address = group.find('trsd_name.and.address')
+        if name_and_address is not None:
+            party_qualifier = get_text_safe(name_and_address.find('tred_party.qualifier'))
+            party_id = get_text_safe(name_and_address.find('tred_party.id.identification'))
+            name = get_text_safe(name_and_address.find('tred_name.and.address.line'))
+            address = get_text_safe(name_and_address.find('tred_street.and.number.p.o.box'))
+            city = get_text_safe(name_and_address.find('tred_city.name'))
+            country = get_text_safe(name_and_address.find('tred_country.coded'))
+
+            self.parsed_data["name_and_address"].append(NameAndAddress(
+                party_qualifier=party_qualifier,
+                party_id=party_id,
+                name=name,
+                address=address,
+                city=city,
+                country=country
+            ))
 
-        # Parse Equipment Details
-        for group in root.findall('COPARNE02.GROUP9'):
-            equipment = group.find('trsd_equipment.details')
-            if equipment is not None:
-                qualifier = get_text_safe(equipment.find('tred_equipment.qualifier'))
-                id_number = get_text_safe(equipment.find('tred_equipment.identification.number'))
-                size_and_type = get_text_safe(equipment.find('tred_equipment.size.and.type.identification'))
-
-                parsed_data["equipment_details"].append(EquipmentDetails(
-                    qualifier=qualifier,
-                    id_number=id_number,
-                    size_and_type=size_and_type
-                ))
+    def _parse_goods_items(self, group):
+        goods_item = group.find('trsd_goods.item.details')
+        if goods_item is not None:
+            item_number = get_text_safe(goods_item.find('tred_goods.item.number'))
+            number_of_packages = get_text_safe(goods_item.find('tred_number.of.packages'))
+            type_of_packages = get_text_safe(goods_item.find('tred_type.of.packages.identification'))
+
+            self.parsed_data["goods_item_details"].append(GoodsItemDetails(
+                item_number=item_number,
+                number_of_packages=number_of_packages,
+                type_of_packages=type_of_packages
+            ))
 
-            # Parse Equipment Measurements
-            for mea in group.findall('trsd_measurements'):
-                dimension_code = get_text_safe(mea.find('tred_measurement.dimension.coded'))
-                value = get_text_safe(mea.find('tred_measurement.value'))
-                parsed_data["measurements"].append(Measurements(dimension_code=dimension_code, value=value))
+        # Parse Measurements
+        for mea in group.findall('trsd_measurements'):
+            self._parse_measurement(mea)
+
+        # Parse Split Goods Placement
+        for split_goods in group.findall('COPARNE02.GROUP7/trsd_split.goods.placement'):
+            equipment_id = get_text_safe(split_goods.find('tred_equipment.identification.number'))
+            num_packages = get_text_safe(split_goods.find('tred_number.of.packages'))
+            self.parsed_data["goods_item_details"].append(GoodsItemDetails(
+                item_number=equipment_id,
+                number_of_packages=num_packages,
+                type_of_packages=""
+            ))
 
-        logger.info("XML parsed successfully")
-        return parsed_data
-    except AttributeError as e:
-        logger.error(f"Error parsing element: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+    def _parse_equipment(self, group):
+        equipment = group.find('trsd_equipment.details')
+        if equipment is not None:
+            qualifier = get_text_safe(equipment.find('tred_equipment.qualifier'))
+            id_number = get_text_safe(equipment.find('tred_equipment.identification.number'))
+            size_and_type = get_text_safe(equipment.find('tred_equipment.size.and.type.identification'))
+
+            self.parsed_data["equipment_details"].append(EquipmentDetails(
+                qualifier=qualifier,
+                id_number=id_number,
+                size_and_type=size_and_type
+            ))
 
-    return parsed_data
+        # Parse Equipment Measurements
+        for mea in group.findall('trsd_measurements'):
+            self._parse_measurement(mea)
+
+    def _parse_date_time_period(self, dtm):
+        qualifier = get_text_safe(dtm.find('tred_date.time.period.qualifier'))
+        period = get_text_safe(dtm.find('tred_date.time.period'))
+        self.parsed_data["date_time_period"].append(DateTimePeriod(qualifier=qualifier, period=period))
+
+    def _parse_measurement(self, mea):
+        dimension_code = get_text_safe(mea.find('tred_measurement.dimension.coded'))
+        value = get_text_safe(mea.find('tred_measurement.value'))
+        self.parsed_data["measurements"].append(Measurements(dimension_code=dimension_code, value=value))
+
+    _group_handlers = (
+        ('COPARNE02.GROUP1', _parse_references),
+        ('COPARNE02.GROUP2', _parse_transport),
+        ('COPARNE02.GROUP3', _parse_name_and_address),
+        ('COPARNE02.GROUP5', _parse_goods_items),
+        ('COPARNE02.GROUP9', _parse_equipment)
+    )
+    # Tag -> (position in the order parse() visits the tags, handler)
+    _stream_handlers = {
+        tag: (rank, handler)
+        for rank, (tag, handler) in enumerate((('COPARNE02.HEADER', _parse_header),) + _group_handlers)
+    }
 
+def parse_xml(xml_message: str) -> dict:
+    return XmlParser().parse(xml_message)
@@ -0,0 +1,66 @@
+import pytest
+import utils.memory
+
+pd = pytest.importorskip("pandas")
+from main import process_messages_bounded
+
+MB = 1024 * 1024
+EDIFACT_MESSAGE = "UNH+1+COPARN:D:99A:UN'BGM+135+1+5'EQD+CN+TCLU4328296+42G1:102:5'"
+
+class ListSink:
+    def __init__(self):
+        self.written = []
+        self.pending = 0
+        self.flushes = 0
+
+    @property
+    def pending_messages(self):
+        return self.pending
+
+    def write(self, parsed_data, format_type=None):
+        self.written.append(parsed_data)
+        self.pending += 1
+
+    def flush(self):
+        self.pending = 0
+        self.flushes += 1
+
+def write_corpus(path, messages):
+    pd.DataFrame({"FORMAT": ["EDIFACT"] * len(messages), "CONTENIDO": messages}).to_csv(path, index=False)
+    return str(path)
+
+def test_pressure_spills_the_sink_and_halves_the_chunks(tmp_path, monkeypatch):
+    file_path = write_corpus(tmp_path / "input.csv", [EDIFACT_MESSAGE] * 14)
+    sink = ListSink()
+    # Over a 1 MB budget for the first two checks, then back under it
+    samples = iter([2, 2, 0.5, 0.5, 0.5])
+    written_at_check = []
+
+    def fake_rss():
+        written_at_check.append(len(sink.written))
+        return int(next(samples) * MB)
+
+    monkeypatch.setattr(utils.memory, "current_rss_bytes", fake_rss)
+    metrics = process_messages_bounded(file_path, str(tmp_path), sink=sink, max_rss_mb=1, chunksize=4,
+                                       check_every=1000)
+
+    # Chunks of 4, then 2 while over the budget, then back to 4
+    assert written_at_check == [4, 6, 8, 12, 14]
+    assert metrics["messages"] == 14
+    assert metrics["throttled"] == 1
+    assert metrics["spills"] == sink.flushes == 1
+    assert metrics["streamed"] == 0
+    assert metrics["peak_rss_mb"] > 0
+
+def test_long_messages_go_through_parse_stream(tmp_path):
+    long_message = EDIFACT_MESSAGE + "FTX+AAI+++" + "X" * 200 + "'"
+    file_path = write_corpus(tmp_path / "input.csv", [EDIFACT_MESSAGE, long_message, EDIFACT_MESSAGE])
+    sink = ListSink()
+
+    metrics = process_messages_bounded(file_path, str(tmp_path), sink=sink, max_rss_mb=1024 * 1024,
+                                       stream_threshold=len(EDIFACT_MESSAGE) + 1)
+
+    assert metrics["streamed"] == 1
+    assert metrics["messages"] == 3
+    assert metrics["spills"] == metrics["throttled"] == 0
+    assert sink.written[1]["free_text"][0].text == "X" * 200
@@ -0,0 +1,20 @@
+import utils.memory
+from utils.memory import MemoryBudget, peak_rss_bytes
+
+MB = 1024 * 1024
+
+def test_pressure_is_reported_again_only_after_another_step(monkeypatch):
+    samples = iter([50, 120, 125, 131, 135, 90, 120])
+    monkeypatch.setattr(utils.memory, "current_rss_bytes", lambda: next(samples) * MB)
+    budget = MemoryBudget(max_rss_mb=100, step_mb=10)
+
+    assert [budget.under_pressure() for _ in range(7)] == [False, True, False, True, False, False, True]
+    assert budget.within_budget() is False
+
+def test_peak_rss_is_the_high_water_mark():
+    ballast = bytearray(64 * MB)
+    peak = peak_rss_bytes()
+    del ballast
+
+    assert peak >= utils.memory.current_rss_bytes()
+    assert peak >= 64 * MB
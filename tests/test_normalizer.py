@@ -0,0 +1,95 @@
+import copy
+import pickle
+from parsers.edifact_parser import parse_edifact
+from parsers.edisimplex_parser import parse_edisimplex
+from parsers.normalizer import CodeInterner, TransportDetails, normalize
+from parsers.xml_parser import parse_xml
+
+EDIFACT_MESSAGE = (
+    "UNB+UNOA:2+ESA83728279+ESA08139404+240508:0809+JKO9708641++COPARN'"
+    "UNH+2400007284240+COPARN:D:99A:UN:FT9922'"
+    "BGM+135+7487202400007284240+5'"
+    "TDT+20+MV123+1++AP02174:172:20:CMA-CGM IBERICA+++9454395:146:11:CMA CGM AMERIGO VESPUCCI:MT'"
+    "NAD+TR+A58898487:160:ZZZ+BEST TERMINAL++CALLE 1+BARCELONA+++ES'"
+    "EQD+CN+TCLU4328296+42G1:102:5'"
+)
+
+def test_canonical_message_survives_pickle_and_deepcopy():
+    message = normalize(parse_edifact(EDIFACT_MESSAGE), "EDIFACT", CodeInterner())
+
+    assert pickle.loads(pickle.dumps(message)) == message
+    assert copy.deepcopy(message) == message
+    assert hash(pickle.loads(pickle.dumps(message))) == hash(message)
+
+def test_edifact_carrier_composite_is_split():
+    message = normalize(parse_edifact(EDIFACT_MESSAGE), "EDIFACT")
+    transport = message.transport_details[0]
+
+    assert transport.carrier_id == "AP02174"
+    assert transport.carrier_name == "CMA-CGM IBERICA"
+    assert transport.transport_id == "9454395"
+    assert transport.transport_name == "CMA CGM AMERIGO VESPUCCI"
+    assert transport.transport_nationality == "MT"
+
+def test_edifact_transport_composite_forms_match_xml():
+    xml_message = (
+        "<COPARNE02><COPARNE02.HEADER><anxs_interchange.header/></COPARNE02.HEADER>"
+        "<COPARNE02.GROUP2><trsd_details.of.transport>"
+        "<tred_transport.stage.qualifier>20</tred_transport.stage.qualifier>"
+        "<tred_mode.of.transport.coded>1</tred_mode.of.transport.coded>"
+        "<trcd_carrier><tred_carrier.identification>AP02174</tred_carrier.identification>"
+        "<tred_carrier.name>CMA-CGM IBERICA</tred_carrier.name></trcd_carrier>"
+        "<trcd_transport.identification><tred_id.of.the.means.of.transport>9454395</tred_id.of.the.means.of.transport>"
+        "<tred_id.of.means.of.transport.identification>CMA CGM AMERIGO VESPUCCI</tred_id.of.means.of.transport.identification>"
+        "<tred_nationality.of.means.of.transport.coded>MT</tred_nationality.of.means.of.transport.coded>"
+        "</trcd_transport.identification></trsd_details.of.transport></COPARNE02.GROUP2></COPARNE02>"
+    )
+    expected = normalize(parse_xml(xml_message), "EDIXML").transport_details
+
+    for composite in ("9454395:146:11:CMA CGM AMERIGO VESPUCCI:MT", "9454395:::CMA CGM AMERIGO VESPUCCI:MT"):
+        edifact_message = f"TDT+20+MV123+1++AP02174:172:20:CMA-CGM IBERICA+++{composite}'"
+        assert normalize(parse_edifact(edifact_message), "EDIFACT").transport_details == expected
+
+def test_edifact_transport_id_without_name():
+    message = normalize(parse_edifact("TDT+20+MV123+1++AP02174+++9454395'"), "EDIFACT")
+
+    assert message.transport_details == (TransportDetails(
+        stage_qualifier="20", mode_of_transport="1", carrier_id="AP02174", carrier_name=None,
+        transport_id="9454395", transport_name=None, transport_nationality=None
+    ),)
+
+def test_location_without_name_is_the_same_in_every_format():
+    edifact = normalize(parse_edifact("LOC+9+ESBCN'"), "EDIFACT")
+    edisimplex = normalize(parse_edisimplex("COPE02006^9^ESBCN"), "EDISIMPLEX")
+    xml = normalize(parse_xml(
+        "<COPARNE02><COPARNE02.HEADER><anxs_interchange.header/></COPARNE02.HEADER>"
+        "<COPARNE02.GROUP2><trcd_location.identification>"
+        "<tred_place.location.qualifier>9</tred_place.location.qualifier>"
+        "<tred_place.location.identification>ESBCN</tred_place.location.identification>"
+        "</trcd_location.identification></COPARNE02.GROUP2></COPARNE02>"
+    ), "EDIXML")
+
+    for message in (edifact, edisimplex, xml):
+        assert (message.references, message.free_text) == ((edifact.references[0],), ())
+    assert edifact.references[0].number == "ESBCN"
+
+def test_edisimplex_weight_gets_a_dimension_code():
+    message = normalize(parse_edisimplex("COPE02013^24000"), "EDISIMPLEX")
+
+    assert [(m.dimension_code, m.value) for m in message.measurements] == [("WT", "24000")]
+
+def test_edifact_size_and_type_drops_code_list_and_agency():
+    message = normalize(parse_edifact(EDIFACT_MESSAGE), "EDIFACT")
+
+    assert message.equipment_details[0].size_and_type == "42G1"
+
+def test_bounded_interner_stops_storing_new_values():
+    interner = CodeInterner(max_values=2)
+    first = "".join(["E", "S"])
+
+    assert interner.intern("country", first) is first
+    assert interner.intern("country", "ES".lower().upper()) is first
+    interner.intern("country", "FR")
+    interner.intern("country", "MT")
+    assert interner.stats() == {"country": 2}
+    assert interner.intern("country", "MT") == "MT"
@@ -0,0 +1,77 @@
+import sqlite3
+import pytest
+from parsers.edifact_parser import parse_edifact
+from utils.sqlite_sink import INDEXES, SQLiteSink
+
+EDIFACT_MESSAGE = (
+    "UNB+UNOA:2+ESA83728279+ESA08139404+240508:0809+JKO9708641++COPARN'"
+    "UNH+2400007284240+COPARN:D:99A:UN:FT9922'"
+    "BGM+135+7487202400007284240+5'"
+    "NAD+TR+A58898487:160:ZZZ+BEST TERMINAL++CALLE 1+BARCELONA+++ES'"
+    "EQD+CN+TCLU4328296+42G1:102:5'"
+    "EQD+CN+TCLU4328297+42G1:102:5'"
+)
+
+def count_rows(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+def index_names(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def test_load_writes_rows_and_builds_indexes(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    parsed_data = parse_edifact(EDIFACT_MESSAGE)
+
+    with SQLiteSink(db_path, batch_size=2) as sink:
+        for _ in range(5):
+            sink.write(parsed_data, "EDIFACT")
+
+    assert sink.stats()["messages"] == 5
+    assert sink.stats()["rows"] == 5 * 5
+    assert count_rows(db_path, "messages") == 5
+    assert count_rows(db_path, "message_header") == 5
+    assert count_rows(db_path, "name_and_address") == 5
+    assert count_rows(db_path, "equipment_details") == 10
+    assert count_rows(db_path, "references") == 0
+    assert index_names(db_path) == {index_name for index_name, _, _ in INDEXES}
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_failed_append_keeps_committed_batches_indexed(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    parsed_data = parse_edifact(EDIFACT_MESSAGE)
+    with SQLiteSink(db_path) as sink:
+        sink.write(parsed_data, "EDIFACT")
+
+    with pytest.raises(RuntimeError):
+        with SQLiteSink(db_path, batch_size=2) as sink:
+            for _ in range(3):
+                sink.write(parsed_data, "EDIFACT")
+            raise RuntimeError("load failed")
+
+    # The first batch of the failed load was committed, the pending message is discarded
+    assert count_rows(db_path, "messages") == 3
+    assert count_rows(db_path, "equipment_details") == 6
+    assert index_names(db_path) == {index_name for index_name, _, _ in INDEXES}
+
+def test_two_sinks_on_the_same_database(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    parsed_data = parse_edifact(EDIFACT_MESSAGE)
+    first = SQLiteSink(db_path, batch_size=2)
+    second = SQLiteSink(db_path, batch_size=2)
+
+    for _ in range(3):
+        first.write(parsed_data, "EDIFACT")
+        second.write(parsed_data, "EDIFACT")
+    first.close()
+    second.close()
+
+    assert count_rows(db_path, "messages") == 6
+    with sqlite3.connect(db_path) as conn:
+        orphans = conn.execute(
+            "SELECT COUNT(*) FROM message_header WHERE message_id NOT IN (SELECT id FROM messages)"
+        ).fetchone()[0]
+    assert orphans == 0
+    assert count_rows(db_path, "message_header") == 6
@@ -0,0 +1,31 @@
+from parsers.xml_parser import XmlParser
+
+HEADER = (
+    "<COPARNE02.HEADER><anxs_interchange.header>"
+    "<anxe_sender.identification>ESA83728279</anxe_sender.identification>"
+    "<anxe_recipient.identification>ESA08139404</anxe_recipient.identification>"
+    "</anxs_interchange.header></COPARNE02.HEADER>"
+)
+GROUP1 = (
+    "<COPARNE02.GROUP1><trcd_reference><tred_reference.qualifier>BN</tred_reference.qualifier>"
+    "<tred_reference.number>B1</tred_reference.number></trcd_reference></COPARNE02.GROUP1>"
+)
+GROUP5 = (
+    "<COPARNE02.GROUP5><trsd_goods.item.details><tred_goods.item.number>1</tred_goods.item.number>"
+    "<tred_number.of.packages>2</tred_number.of.packages></trsd_goods.item.details>"
+    "<trsd_measurements><tred_measurement.dimension.coded>WT</tred_measurement.dimension.coded>"
+    "<tred_measurement.value>100</tred_measurement.value></trsd_measurements></COPARNE02.GROUP5>"
+)
+
+def test_parse_stream_matches_parse():
+    parser = XmlParser()
+    messages = [
+        f"<COPARNE02>{HEADER}{GROUP1}{GROUP5}</COPARNE02>",
+        # Groups out of order and header last
+        f"<COPARNE02>{GROUP5}{GROUP1}{GROUP5}{HEADER}</COPARNE02>",
+        # No header: parse() gives up before the groups
+        f"<COPARNE02>{GROUP1}{GROUP5}</COPARNE02>",
+        f"<COPARNE02>{HEADER}{GROUP1}",
+    ]
+    for message in messages:
+        assert parser.parse_stream(message) == parser.parse(message)
@@ -0,0 +1,57 @@
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def current_rss_bytes() -> int:
+    """Returns the resident set size of this process, or 0 if it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    # Without /proc only the peak is available
+    return peak_rss_bytes()
+
+def peak_rss_bytes() -> int:
+    """Returns the highest RSS this process has reached, or 0 if it cannot be read."""
+    if resource is None:
+        return 0
+    # Kilobytes on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+class MemoryBudget:
+    """Tracks the process RSS against a ceiling.
+
+    CPython rarely hands freed memory back to the OS, so once RSS is over the
+    ceiling it tends to stay there. under_pressure() therefore reports the
+    first time RSS goes over, and after that only when it has grown by another
+    step_mb. It resets once RSS is back under the ceiling.
+    """
+
+    def __init__(self, max_rss_mb: float, step_mb: Optional[float] = None):
+        if step_mb is None:
+            step_mb = max(max_rss_mb / 20, 8)
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024)
+        self.step_bytes = int(step_mb * 1024 * 1024)
+        self.rss_bytes = 0
+        self._reported_rss_bytes = None
+
+    def within_budget(self) -> bool:
+        """Whether the RSS seen by the last under_pressure() call was under the ceiling."""
+        return self.rss_bytes <= self.max_rss_bytes
+
+    def under_pressure(self) -> bool:
+        rss = self.rss_bytes = current_rss_bytes()
+        if rss <= self.max_rss_bytes:
+            self._reported_rss_bytes = None
+            return False
+        if self._reported_rss_bytes is not None and rss < self._reported_rss_bytes + self.step_bytes:
+            return False
+        self._reported_rss_bytes = rss
+        return True
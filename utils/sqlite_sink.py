@@ -0,0 +1,175 @@
+import sqlite3
+import time
+from typing import Optional
+from utils.logger import logger
+
+# Columns stored for each parsed_data section, in table order. Table names are
+# quoted in SQL because "references" is a reserved word.
+SECTION_COLUMNS = {
+    "message_header": ("sender_id", "recipient_id", "message_reference_number", "message_type", "version_number"),
+    "beginning_of_message": ("message_name_code", "document_message_number", "message_function_code"),
+    "date_time_period": ("qualifier", "period"),
+    "free_text": ("qualifier", "text"),
+    "references": ("qualifier", "number"),
+    "transport_details": ("stage_qualifier", "mode_of_transport", "carrier_id", "carrier_name",
+                          "transport_id", "transport_name", "transport_nationality"),
+    "name_and_address": ("party_qualifier", "party_id", "name", "address", "city", "country"),
+    "goods_item_details": ("item_number", "number_of_packages", "type_of_packages"),
+    "measurements": ("dimension_code", "value"),
+    "equipment_details": ("qualifier", "id_number", "size_and_type")
+}
+
+# Indexes are dropped before the first insert and rebuilt once the load is
+# finished, so inserts do not maintain them, also when appending to an existing database
+INDEXES = (
+    ("idx_message_header_reference", "message_header", "message_reference_number"),
+    ("idx_equipment_details_id_number", "equipment_details", "id_number"),
+    ("idx_name_and_address_party_id", "name_and_address", "party_id")
+)
+
+class SQLiteSink:
+    """Writes parsed_data into a SQLite database, one table per section.
+
+    Rows are buffered and inserted with executemany, one transaction per
+    batch_size messages. Message ids are assigned inside that transaction,
+    so several sinks can write to the same database. Call close() (or use the
+    sink as a context manager) to flush the last batch and build the indexes.
+    When the context manager exits with an exception, the pending batch is
+    discarded, and the batches already inserted are kept and indexed.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 1000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+        self._insert_sql = {
+            section: f'INSERT INTO "{section}" (message_id, {", ".join(columns)}) '
+                     f"VALUES (?, {', '.join('?' for _ in columns)})"
+            for section, columns in SECTION_COLUMNS.items()
+        }
+        self._messages = []
+        self._rows = {section: [] for section in SECTION_COLUMNS}
+
+        self._indexes_dropped = False
+        self.messages_written = 0
+        self.rows_written = 0
+        self._started_at = time.perf_counter()
+
+    def _create_tables(self):
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, format TEXT)")
+            for section, columns in SECTION_COLUMNS.items():
+                column_defs = ", ".join(f"{column} TEXT" for column in columns)
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{section}" '
+                    f"(message_id INTEGER REFERENCES messages(id), {column_defs})"
+                )
+
+    def write(self, parsed_data: dict, format_type: Optional[str] = None):
+        """Buffers one parsed message. Its id is assigned when the batch is inserted."""
+        # Rows refer to their message by its position in the batch until then
+        position = len(self._messages)
+        self._messages.append((position, format_type))
+
+        for section, columns in SECTION_COLUMNS.items():
+            rows = self._rows[section]
+            for entry in parsed_data.get(section, []):
+                rows.append((position,) + tuple(getattr(entry, column, None) for column in columns))
+
+        if len(self._messages) >= self.batch_size:
+            self.flush()
+
+    @property
+    def pending_messages(self) -> int:
+        """Messages buffered in memory and not yet inserted."""
+        return len(self._messages)
+
+    def flush(self):
+        """Inserts the buffered batch in a single transaction."""
+        if not self._messages:
+            return
+        rows_written = 0
+        try:
+            with self._conn:
+                # Takes the write lock before reading MAX(id), so another sink
+                # on the same database cannot hand out the same ids
+                self._conn.execute("BEGIN IMMEDIATE")
+                if not self._indexes_dropped:
+                    self.drop_indexes()
+                first_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM messages").fetchone()[0]
+                self._conn.executemany("INSERT INTO messages (id, format) VALUES (?, ?)",
+                                       ((first_id + position, format_type) for position, format_type in self._messages))
+                for section, rows in self._rows.items():
+                    if rows:
+                        self._conn.executemany(self._insert_sql[section],
+                                               ((first_id + row[0],) + row[1:] for row in rows))
+                        rows_written += len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write batch of {len(self._messages)} messages to {self.db_path}: {e}")
+            raise
+
+        self._indexes_dropped = True
+        self.messages_written += len(self._messages)
+        self.rows_written += rows_written
+        logger.debug(f"Inserted batch of {len(self._messages)} messages into {self.db_path}")
+        self._messages = []
+        self._rows = {section: [] for section in SECTION_COLUMNS}
+
+    def drop_indexes(self):
+        for index_name, _, _ in INDEXES:
+            self._conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    def create_indexes(self):
+        with self._conn:
+            for index_name, table, column in INDEXES:
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table}" ({column})')
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started_at
+        return {
+            "messages": self.messages_written,
+            "rows": self.rows_written,
+            "seconds": elapsed,
+            "rows_per_second": self.rows_written / elapsed if elapsed > 0 else 0.0
+        }
+
+    def close(self, load_complete: bool = True) -> dict:
+        """Flushes pending rows, builds the indexes and returns the load statistics.
+
+        With load_complete=False the pending rows are discarded. The indexes
+        are still rebuilt if this sink dropped them, since the batches already
+        inserted stay in the tables. The connection is closed in every case.
+        """
+        if self._conn is None:
+            return self.stats()
+        try:
+            if load_complete:
+                self.flush()
+            elif self._messages:
+                logger.warning(f"Discarding {len(self._messages)} pending messages for {self.db_path} after a failed load")
+                self._messages = []
+                self._rows = {section: [] for section in SECTION_COLUMNS}
+        finally:
+            try:
+                if load_complete or self._indexes_dropped:
+                    self.create_indexes()
+            finally:
+                self._conn.close()
+                self._conn = None
+
+        stats = self.stats()
+        logger.info(
+            f"Loaded {stats['messages']} messages ({stats['rows']} rows) into {self.db_path} "
+            f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/sec)"
+        )
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(load_complete=exc_type is None)
@@ -0,0 +1,11 @@
+def iter_split(text: str, separator: str):
+    """Lazily yields the pieces of text.split(separator) without building the full list."""
+    start = 0
+    step = len(separator)
+    while True:
+        end = text.find(separator, start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + step